@@ -1,12 +1,36 @@
+import importlib
+import typing
+
 from stark.codecs.base import BaseCodec
 from stark.codecs.jsondata import JSONCodec
-from stark.codecs.jsonschema import JSONSchemaCodec
-from stark.codecs.multipart import MultiPartCodec
-from stark.codecs.openapi import OpenAPICodec
-from stark.codecs.text import TextCodec
-from stark.codecs.urlencoded import URLEncodedCodec
+
+if typing.TYPE_CHECKING:
+    from stark.codecs.jsonschema import JSONSchemaCodec
+    from stark.codecs.multipart import MultiPartCodec
+    from stark.codecs.openapi import OpenAPICodec
+    from stark.codecs.text import TextCodec
+    from stark.codecs.urlencoded import URLEncodedCodec
 
 __all__ = [
     'BaseCodec', 'JSONCodec', 'JSONSchemaCodec', 'OpenAPICodec',
     'TextCodec', 'MultiPartCodec', 'URLEncodedCodec',
 ]
+
+# Codecs that are imported on first access only.
+LAZY_CODECS = {
+    'JSONSchemaCodec': 'stark.codecs.jsonschema',
+    'MultiPartCodec': 'stark.codecs.multipart',
+    'OpenAPICodec': 'stark.codecs.openapi',
+    'TextCodec': 'stark.codecs.text',
+    'URLEncodedCodec': 'stark.codecs.urlencoded',
+}
+
+
+def __getattr__(name):
+    try:
+        module = LAZY_CODECS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    codec = getattr(importlib.import_module(module), name)
+    globals()[name] = codec
+    return codec
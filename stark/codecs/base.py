@@ -1,8 +1,9 @@
+import typing
 from stark.exceptions import NoCodecAvailable
 
 
 class BaseCodec:
-    media_type = None
+    media_type: typing.Optional[str] = None
 
     def decode(self, bytestring, **options):
         raise NoCodecAvailable()
@@ -1,22 +1,55 @@
+import re
 import json
 from stark.schema import ParseError
-from stark.compat import dict_type
+from stark.compat import orjson
 from stark.codecs.base import BaseCodec
 
 
+# orjson reads integers beyond 64 bits as lossy floats, so bodies
+# with number tokens this long are left to the json module
+LONG_NUMBER = re.compile(rb"(?:^|[\[:,])\s*-?\d{19}")
+
+
+def dumps(item, indent=False) -> bytes:
+    """
+    Serialize `item` with orjson when available. Anything orjson refuses,
+    eg. integers beyond 64 bits, goes through the json module with the same layout.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(item, option=option)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(
+        item,
+        ensure_ascii=False,
+        indent=2 if indent else None,
+        separators=(',', ': ') if indent else (',', ':')
+    ).encode('utf-8')
+
+
 class JSONCodec(BaseCodec):
     media_type = 'application/json'
 
     def decode(self, bytestring, **options):
         try:
-            return json.loads(
-                bytestring.decode('utf-8'),
-                object_pairs_hook=dict_type
-            )
+            if orjson is not None and (len(bytestring) < 19 or not LONG_NUMBER.search(bytestring)):
+                try:
+                    return orjson.loads(bytestring)
+                except orjson.JSONDecodeError:
+                    # NaN, Infinity or out of range floats are still accepted
+                    # by the json module, which also reports the actual error
+                    pass
+            return json.loads(bytestring)
         except ValueError as exc:
             raise ParseError(text='Malformed JSON. %s' % exc,
                              key='body',
                              code='codec') from None
 
     def encode(self, item, **options):
+        if options.keys() <= {'indent'}:
+            return dumps(item, options.get('indent'))
         return json.dumps(item, **options).encode('utf-8')
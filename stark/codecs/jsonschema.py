@@ -1,11 +1,10 @@
 import re
-import json
 import typing
+import weakref
 from stark.schema import (
     SchemaBase,
     SchemaDefinitions,
     Schema,
-    is_schema,
     Field,
     Any,
     NeverMatch,
@@ -26,41 +25,63 @@ from stark.schema import (
     Not
 )
 from stark.codecs.base import BaseCodec
+from stark.codecs.jsondata import dumps
+
+
+# flags of a pattern compiled from a str without explicit flags
+UNICODE_FLAGS = int(re.RegexFlag.UNICODE)
 
 
 class JSONSchemaCodec(BaseCodec):
     media_type = "application/schema+json"
     format = "jsonschema"
 
+    def __init__(self) -> None:
+        # item -> {indent: encoded bytes}, kept per codec since subclasses
+        # may encode the same item differently
+        self.encoded: "weakref.WeakKeyDictionary[typing.Any, typing.Dict[bool, bytes]]" = \
+            weakref.WeakKeyDictionary()
+
+    def clear(self, item=None):
+        """
+        Drop the cached output for `item`, or for everything.
+        Call it after changing a schema that has already been encoded.
+        """
+        if item is None:
+            self.encoded.clear()
+        else:
+            self.encoded.pop(item, None)
+
     def encode(self, item, **options):
+        indent = bool(options.get("indent"))
+        try:
+            return self.encoded[item][indent]
+        except (KeyError, TypeError):
+            pass
         definitions = {}
         encoder = JSONSchemaEncoder(definitions=definitions)
         struct = encoder.encode(item)
         if definitions:
             struct["definitions"] = definitions
-        indent = options.get("indent")
-        if indent:
-            kwargs = {
-                "ensure_ascii": False,
-                "indent": 4,
-                "separators": (",", ":")
-            }
-        else:
-            kwargs = {
-                "ensure_ascii": False,
-                "indent": None,
-                "separators": (",", ":")
-            }
-        return json.dumps(struct, **kwargs).encode('utf-8')
+        content = dumps(struct, indent)
+        try:
+            self.encoded.setdefault(item, {})[indent] = content
+        except TypeError:
+            # not hashable or not weak-referenceable
+            pass
+        return content
 
 
 class JSONSchemaEncoder:
+    __slots__ = ("definition_base", "definitions", "_memo")
 
     def __init__(self,
-                 definitions: dict = None,
-                 definition_base: str = "definitions"):
+                 definitions: typing.Optional[dict] = None,
+                 definition_base: str = "definitions") -> None:
         self.definition_base = definition_base
         self.definitions = {} if definitions is None else definitions
+        # id(arg) -> (arg, encoded), keeping arg alive so its id can't be reused
+        self._memo: typing.Dict[int, typing.Tuple[typing.Any, dict]] = {}
 
     def encode(self,
                arg: typing.Union[Field, typing.Type[SchemaBase], typing.Type[Schema]]) -> typing.Union[bool, dict]:
@@ -70,166 +91,209 @@ class JSONSchemaEncoder:
         if isinstance(arg, NeverMatch):
             return False
 
+        try:
+            return self._memo[id(arg)][1]
+        except KeyError:
+            pass
+
         data: dict = {}
 
         if isinstance(arg, Field):
             field = arg
         elif isinstance(arg, SchemaDefinitions):
-            field = None
-            for key, value in field.items():
+            for key, value in arg.items():
                 self.definitions[key] = self.encode(value)
             return {}
         else:
-            try:
-                field = arg.make_schema()
-            except AttributeError:
-                field = arg.make_validator()
-
-        if isinstance(field, Reference):
-            data["$ref"] = f"#/{self.definition_base}/{field.target_string}"
-            if field.target not in self.definitions:
-                self.definitions[field.target_string] = self.encode(field.target)
-
-        elif isinstance(field, String):
-            data["type"] = ["string", "null"] if field.allow_null else "string"
-            data.update(self.get_standard_properties(field))
-            if field.min_length is not None or not field.allow_blank:
-                data["minLength"] = field.min_length or 1
-            if field.max_length is not None:
-                data["maxLength"] = field.max_length
-            if field.pattern_regex is not None:
-                if field.pattern_regex.flags != re.RegexFlag.UNICODE:
-                    flags = re.RegexFlag(field.pattern_regex.flags)
-                    raise ValueError(
-                        f"Cannot convert regular expression with non-standard flags "
-                        f"to JSON schema: {flags!s}"
-                    )
-                data["pattern"] = field.pattern_regex.pattern
-            if field.format is not None:
-                data["format"] = field.format
-
-        elif isinstance(field, (Integer, Float, Decimal)):
-            base_type = "integer" if isinstance(field, Integer) else "number"
-            data["type"] = [base_type, "null"] if field.allow_null else base_type
-            data.update(self.get_standard_properties(field))
-            if field.minimum is not None:
-                data["minimum"] = field.minimum
-            if field.maximum is not None:
-                data["maximum"] = field.maximum
-            if field.exclusive_minimum is not None:
-                data["exclusiveMinimum"] = field.exclusive_minimum
-            if field.exclusive_maximum is not None:
-                data["exclusiveMaximum"] = field.exclusive_maximum
-            if field.multiple_of is not None:
-                data["multipleOf"] = field.multiple_of
-
-        elif isinstance(field, Boolean):
-            data["type"] = ["boolean", "null"] if field.allow_null else "boolean"
-            data.update(self.get_standard_properties(field))
-
-        elif isinstance(field, Array):
-            data["type"] = ["array", "null"] if field.allow_null else "array"
-            data.update(self.get_standard_properties(field))
-            if field.min_items is not None:
-                data["minItems"] = field.min_items
-            if field.max_items is not None:
-                data["maxItems"] = field.max_items
-            if field.items is not None:
-                if isinstance(field.items, (list, tuple)):
-                    data["items"] = [self.encode(item) for item in field.items]
-                else:
-                    data["items"] = self.encode(field.items)
-            if field.additional_items is not None:
-                if isinstance(field.additional_items, bool):
-                    data["additionalItems"] = field.additional_items
-                else:
-                    data["additionalItems"] = self.encode(field.additional_items)
-            if field.unique_items is not False:
-                data["uniqueItems"] = True
-
-        elif isinstance(field, Object):
-            data["type"] = ["object", "null"] if field.allow_null else "object"
-            data.update(self.get_standard_properties(field))
-            if field.properties:
-                data["properties"] = {
-                    key: self.encode(value)
-                    for key, value in field.properties.items()
-                }
-            if field.pattern_properties:
-                data["patternProperties"] = {
-                    key: self.encode(value)
-                    for key, value in field.pattern_properties.items()
-                }
-            if field.additional_properties is not None:
-                if isinstance(field.additional_properties, bool):
-                    data["additionalProperties"] = field.additional_properties
-                else:
-                    data["additionalProperties"] = self.encode(field.additional_properties)
-            if field.property_names is not None:
-                data["propertyNames"] = self.encode(field.property_names)
-            if field.max_properties is not None:
-                data["maxProperties"] = field.max_properties
-            if field.min_properties is not None:
-                data["minProperties"] = field.min_properties
-            if field.required:
-                data["required"] = field.required
-            if is_schema(arg) and hasattr(arg, '_meta'):
-                if arg._meta.read_only:
-                    for key in arg._meta.read_only:
-                        if key in data["properties"]:
-                            data["properties"][key]["readOnly"] = True
-        elif isinstance(field, Choice):
-            data["enum"] = [key for key, value in field.choices]
-            data["enumNames"] = [value for key, value in field.choices]
-            data.update(self.get_standard_properties(field))
-
-        elif isinstance(field, Const):
-            data["const"] = field.const
-            data.update(self.get_standard_properties(field))
-
-        elif isinstance(field, Union):
-            data["anyOf"] = [
-                self.encode(item) for item in field.any_of
-            ]
-            data.update(self.get_standard_properties(field))
-
-        elif isinstance(field, OneOf):
-            data["oneOf"] = [
-                self.encode(item) for item in field.one_of
-            ]
-            data.update(self.get_standard_properties(field))
-
-        elif isinstance(field, AllOf):
-            data["allOf"] = [
-                self.encode(item) for item in field.all_of
-            ]
-            data.update(self.get_standard_properties(field))
-
-        elif isinstance(field, IfThenElse):
-            data["if"] = self.encode(field.if_clause)
-            if field.then_clause is not None:
-                data["then"] = self.encode(field.then_clause)
-            if field.else_clause is not None:
-                data["else"] = self.encode(field.else_clause)
-            data.update(self.get_standard_properties(field))
-
-        elif isinstance(field, Not):
-            data["not"] = self.encode(field.negated)
-            data.update(self.get_standard_properties(field))
-
-        elif field is not None:
-            name = type(field).__qualname__
-            raise ValueError(f"Cannot convert field type {name!r} to JSON Schema")
+            make_schema = getattr(arg, "make_schema", None)
+            field = arg.make_validator() if make_schema is None else make_schema()
+
+        getattr(self, get_encoder(type(field)))(field, data)
 
+        meta = getattr(arg, "_meta", None)
+        if meta is not None and meta.read_only:
+            properties = data.get("properties")
+            if properties:
+                for key in meta.read_only:
+                    value = properties.get(key)
+                    if isinstance(value, dict):
+                        # encoded properties may be shared, so don't modify them in place
+                        properties[key] = dict(value, readOnly=True)
+
+        self._memo[id(arg)] = (arg, data)
         return data
 
+    def encode_reference(self, field: Reference, data: dict) -> None:
+        name = field.target_string
+        data["$ref"] = f"#/{self.definition_base}/{name}"
+        if name not in self.definitions:
+            # reserve the name first, so that recursive references terminate
+            self.definitions[name] = {}
+            self.definitions[name] = self.encode(field.target)
+
+    def encode_string(self, field: String, data: dict) -> None:
+        data["type"] = ["string", "null"] if field.allow_null else "string"
+        self.add_standard_properties(field, data)
+        if field.min_length is not None or not field.allow_blank:
+            data["minLength"] = field.min_length or 1
+        if field.max_length is not None:
+            data["maxLength"] = field.max_length
+        # typesystem leaves the attribute to inference, which fails on its None branch
+        pattern_regex: typing.Optional[typing.Pattern] = field.pattern_regex  # type: ignore[has-type]
+        if pattern_regex is not None:
+            if pattern_regex.flags != UNICODE_FLAGS:
+                flags = re.RegexFlag(pattern_regex.flags)
+                raise ValueError(
+                    f"Cannot convert regular expression with non-standard flags "
+                    f"to JSON schema: {flags!s}"
+                )
+            data["pattern"] = pattern_regex.pattern
+        if field.format is not None:
+            data["format"] = field.format
+
+    def encode_number(self, field: typing.Union[Integer, Float, Decimal], data: dict) -> None:
+        base_type = "integer" if isinstance(field, Integer) else "number"
+        data["type"] = [base_type, "null"] if field.allow_null else base_type
+        self.add_standard_properties(field, data)
+        if field.minimum is not None:
+            data["minimum"] = field.minimum
+        if field.maximum is not None:
+            data["maximum"] = field.maximum
+        if field.exclusive_minimum is not None:
+            data["exclusiveMinimum"] = field.exclusive_minimum
+        if field.exclusive_maximum is not None:
+            data["exclusiveMaximum"] = field.exclusive_maximum
+        if field.multiple_of is not None:
+            data["multipleOf"] = field.multiple_of
+
+    def encode_boolean(self, field: Boolean, data: dict) -> None:
+        data["type"] = ["boolean", "null"] if field.allow_null else "boolean"
+        self.add_standard_properties(field, data)
+
+    def encode_array(self, field: Array, data: dict) -> None:
+        encode = self.encode
+        data["type"] = ["array", "null"] if field.allow_null else "array"
+        self.add_standard_properties(field, data)
+        if field.min_items is not None:
+            data["minItems"] = field.min_items
+        if field.max_items is not None:
+            data["maxItems"] = field.max_items
+        if field.items is not None:
+            if isinstance(field.items, (list, tuple)):
+                data["items"] = [encode(item) for item in field.items]
+            else:
+                data["items"] = encode(field.items)
+        if field.additional_items is not None:
+            if isinstance(field.additional_items, bool):
+                data["additionalItems"] = field.additional_items
+            else:
+                data["additionalItems"] = encode(field.additional_items)
+        if field.unique_items is not False:
+            data["uniqueItems"] = True
+
+    def encode_object(self, field: Object, data: dict) -> None:
+        encode = self.encode
+        data["type"] = ["object", "null"] if field.allow_null else "object"
+        self.add_standard_properties(field, data)
+        if field.properties:
+            data["properties"] = {
+                key: encode(value)
+                for key, value in field.properties.items()
+            }
+        if field.pattern_properties:
+            data["patternProperties"] = {
+                key: encode(value)
+                for key, value in field.pattern_properties.items()
+            }
+        if field.additional_properties is not None:
+            if isinstance(field.additional_properties, bool):
+                data["additionalProperties"] = field.additional_properties
+            else:
+                data["additionalProperties"] = encode(field.additional_properties)
+        if field.property_names is not None:
+            data["propertyNames"] = encode(field.property_names)
+        if field.max_properties is not None:
+            data["maxProperties"] = field.max_properties
+        if field.min_properties is not None:
+            data["minProperties"] = field.min_properties
+        if field.required:
+            data["required"] = field.required
+
+    def encode_choice(self, field: Choice, data: dict) -> None:
+        data["enum"] = [key for key, value in field.choices]
+        data["enumNames"] = [value for key, value in field.choices]
+        self.add_standard_properties(field, data)
+
+    def encode_const(self, field: Const, data: dict) -> None:
+        data["const"] = field.const
+        self.add_standard_properties(field, data)
+
+    def encode_union(self, field: Union, data: dict) -> None:
+        encode = self.encode
+        data["anyOf"] = [encode(item) for item in field.any_of]
+        self.add_standard_properties(field, data)
+
+    def encode_one_of(self, field: OneOf, data: dict) -> None:
+        encode = self.encode
+        data["oneOf"] = [encode(item) for item in field.one_of]
+        self.add_standard_properties(field, data)
+
+    def encode_all_of(self, field: AllOf, data: dict) -> None:
+        encode = self.encode
+        data["allOf"] = [encode(item) for item in field.all_of]
+        self.add_standard_properties(field, data)
+
+    def encode_if_then_else(self, field: IfThenElse, data: dict) -> None:
+        data["if"] = self.encode(field.if_clause)
+        if field.then_clause is not None:
+            data["then"] = self.encode(field.then_clause)
+        if field.else_clause is not None:
+            data["else"] = self.encode(field.else_clause)
+        self.add_standard_properties(field, data)
+
+    def encode_not(self, field: Not, data: dict) -> None:
+        data["not"] = self.encode(field.negated)
+        self.add_standard_properties(field, data)
+
     @staticmethod
-    def get_standard_properties(field: Field) -> dict:
-        data = {}
+    def add_standard_properties(field: Field, data: dict) -> None:
         if field.has_default() and field.default is not ...:
             data["default"] = field.default
         if field.title:
             data["title"] = field.title
         if field.description:
             data["description"] = field.description
-        return data
+
+
+# field type -> encoder method name, extended with subclasses on first use;
+# names rather than functions so JSONSchemaEncoder subclasses can override them
+ENCODERS: typing.Dict[type, str] = {
+    Reference: "encode_reference",
+    String: "encode_string",
+    Integer: "encode_number",
+    Float: "encode_number",
+    Decimal: "encode_number",
+    Boolean: "encode_boolean",
+    Array: "encode_array",
+    Object: "encode_object",
+    Choice: "encode_choice",
+    Const: "encode_const",
+    Union: "encode_union",
+    OneOf: "encode_one_of",
+    AllOf: "encode_all_of",
+    IfThenElse: "encode_if_then_else",
+    Not: "encode_not",
+}
+
+
+def get_encoder(field_type: type) -> str:
+    try:
+        return ENCODERS[field_type]
+    except KeyError:
+        pass
+    for base in field_type.__mro__[1:]:
+        if base in ENCODERS:
+            encoder = ENCODERS[field_type] = ENCODERS[base]
+            return encoder
+    name = field_type.__qualname__
+    raise ValueError(f"Cannot convert field type {name!r} to JSON Schema")
@@ -1,6 +1,10 @@
-import json
+import re
+import functools
+import weakref
+from itertools import chain
 from urllib.parse import urlparse
 from stark.codecs import BaseCodec
+from stark.codecs.jsondata import dumps
 from stark.codecs.jsonschema import JSONSchemaEncoder
 from stark.schema import (
     SchemaDefinitions,
@@ -14,7 +18,6 @@ from stark.schema import (
     Boolean,
     is_schema
 )
-from stark.compat import dict_type
 from stark.document import Document
 
 
@@ -30,406 +33,454 @@ ResponseRef = Object(
     properties={"$ref": String(pattern="^#/components/responses/")}
 )
 
-openapi_definitions = SchemaDefinitions()
-
-OpenAPI = Object(
-    title="OpenAPI",
-    properties={
-        "openapi": String(),
-        "info": Reference("Info", definitions=openapi_definitions),
-        "servers": Array(items=Reference("Server", definitions=openapi_definitions)),
-        "paths": Reference("Paths", definitions=openapi_definitions),
-        "components": Reference("Components", definitions=openapi_definitions),
-        "security": Array(items=Reference("SecurityRequirement", definitions=openapi_definitions)),
-        "tags": Array(items=Reference("Tag", definitions=openapi_definitions)),
-        "externalDocs": Reference("ExternalDocumentation", definitions=openapi_definitions),
-    },
-    pattern_properties={
-        "^x-": Any(),
-    },
-    additional_properties=False,
-    required=["openapi", "info", "paths"]
-)
-
-openapi_definitions["JSONSchema"] = JSONSchema
-
-openapi_definitions["Info"] = Object(
-    properties={
-        "title": String(allow_blank=True),
-        "description": String(format="textarea", allow_blank=True),
-        "termsOfService": String(format="url", allow_blank=True),
-        "contact": Reference("Contact", definitions=openapi_definitions),
-        "license": Reference("License", definitions=openapi_definitions),
-        "version": String(allow_blank=True),
-    },
-    pattern_properties={
-        "^x-": Any(),
-    },
-    additional_properties=False,
-    required=["title", "version"]
-)
-
-openapi_definitions["Contact"] = Object(
-    properties={
-        "name": String(),
-        "url": String(format="url"),
-        "email": String(format="email"),
-    },
-    pattern_properties={
-        "^x-": Any(),
-    },
-    additional_properties=False,
-)
-
-openapi_definitions["License"] = Object(
-    properties={
-        "name": String(),
-        "url": String(format="url"),
-    },
-    required=["name"],
-    pattern_properties={
-        "^x-": Any(),
-    },
-    additional_properties=False,
-)
-
-openapi_definitions["Server"] = Object(
-    properties={
-        "url": String(allow_blank=True),
-        "description": String(format="textarea"),
-        "variables": Object(additional_properties=Reference("ServerVariable", definitions=openapi_definitions)),
-    },
-    pattern_properties={
-        "^x-": Any(),
-    },
-    additional_properties=False,
-    required=["url"]
-)
-
-openapi_definitions["ServerVariable"] = Object(
-    properties={
-        "enum": Array(items=String()),
-        "default": String(),
-        "description": String(format="textarea"),
-    },
-    pattern_properties={
-        "^x-": Any(),
-    },
-    additional_properties=False,
-    required=["default"]
-)
-
-openapi_definitions["Paths"] = Object(
-    pattern_properties={
-        "^/": Reference("Path", definitions=openapi_definitions),
-        "^x-": Any(),
-    },
-    additional_properties=False,
-)
-
-openapi_definitions["Path"] = Object(
-    properties={
-        "summary": String(),
-        "description": String(format="textarea"),
-        "get": Reference("Operation", definitions=openapi_definitions),
-        "put": Reference("Operation", definitions=openapi_definitions),
-        "post": Reference("Operation", definitions=openapi_definitions),
-        "delete": Reference("Operation", definitions=openapi_definitions),
-        "options": Reference("Operation", definitions=openapi_definitions),
-        "head": Reference("Operation", definitions=openapi_definitions),
-        "patch": Reference("Operation", definitions=openapi_definitions),
-        "trace": Reference("Operation", definitions=openapi_definitions),
-        "servers": Array(items=Reference("Server", definitions=openapi_definitions)),
-        "parameters": Array(items=Reference("Parameter", definitions=openapi_definitions))  # TODO: | ReferenceObject
-    },
-    pattern_properties={
-        "^x-": Any(),
-    },
-    additional_properties=False,
-)
-
-openapi_definitions["Operation"] = Object(
-    properties={
-        "tags": Array(items=String()),
-        "summary": String(),
-        "description": String(format="textarea"),
-        "externalDocs": Reference("ExternalDocumentation", definitions=openapi_definitions),
-        "operationId": String(),
-        "parameters": Array(items=Reference("Parameter", definitions=openapi_definitions)),
-        # TODO: | ReferenceObject
-        "requestBody": RequestBodyRef | Reference("RequestBody", definitions=openapi_definitions),
-        # TODO: RequestBody | ReferenceObject
-        "responses": Reference("Responses", definitions=openapi_definitions),
-        # TODO: "callbacks"
-        "deprecated": Boolean(),
-        "security": Array(Reference("SecurityRequirement", definitions=openapi_definitions)),
-        "servers": Array(items=Reference("Server", definitions=openapi_definitions)),
-    },
-    pattern_properties={
-        "^x-": Any(),
-    },
-    additional_properties=False,
-)
-
-openapi_definitions["ExternalDocumentation"] = Object(
-    properties={
-        "description": String(format="textarea"),
-        "url": String(format="url"),
-    },
-    pattern_properties={
-        "^x-": Any(),
-    },
-    additional_properties=False,
-    required=["url"]
-)
-
-openapi_definitions["Parameter"] = Object(
-    properties={
-        "name": String(),
-        "in": Choice(choices=["query", "header", "path", "cookie"]),
-        "description": String(format="textarea"),
-        "required": Boolean(),
-        "deprecated": Boolean(),
-        "allowEmptyValue": Boolean(),
-        "style": String(),
-        "schema": Reference("JSONSchema", definitions=openapi_definitions) | SchemaRef,
-        "example": Any(),
-        # TODO: Other fields
-    },
-    pattern_properties={
-        "^x-": Any(),
-    },
-    additional_properties=False,
-    required=["name", "in"]
-)
-
-openapi_definitions["RequestBody"] = Object(
-    properties={
-        "description": String(),
-        "content": Object(additional_properties=Reference("MediaType", definitions=openapi_definitions)),
-        "required": Boolean(),
-    },
-    pattern_properties={
-        "^x-": Any(),
-    },
-    additional_properties=False,
-)
-
-openapi_definitions["Responses"] = Object(
-    properties={
-        "default": Reference("Response", definitions=openapi_definitions) | ResponseRef,
-    },
-    pattern_properties={
-        "^([1-5][0-9][0-9]|[1-5]XX)$": Reference("Response", definitions=openapi_definitions) | ResponseRef,
-        "^x-": Any(),
-    },
-    additional_properties=False,
-)
-
-openapi_definitions["Response"] = Object(
-    properties={
-        "description": String(),
-        "content": Object(additional_properties=Reference("MediaType", definitions=openapi_definitions)),
-        "headers": Object(additional_properties=Reference("Header", definitions=openapi_definitions)),
-        # TODO: Header | ReferenceObject
-        # TODO: links
-    },
-    pattern_properties={
-        "^x-": Any(),
-    },
-    additional_properties=False,
-)
-
-openapi_definitions["MediaType"] = Object(
-    properties={
-        "schema": Reference("JSONSchema", definitions=openapi_definitions) | SchemaRef,
-        "example": Any(),
-        # TODO "examples", "encoding"
-    },
-    pattern_properties={
-        "^x-": Any(),
-    },
-    additional_properties=False,
-)
-
-openapi_definitions["Header"] = Object(
-    properties={
-        "description": String(format="textarea"),
-        "required": Boolean(),
-        "deprecated": Boolean(),
-        "allowEmptyValue": Boolean(),
-        "style": String(),
-        "schema": Reference("JSONSchema", definitions=openapi_definitions) | SchemaRef,
-        "example": Any(),
-        # TODO: Other fields
-    },
-    pattern_properties={
-        "^x-": Any(),
-    },
-    additional_properties=False
-)
-
-openapi_definitions["Components"] = Object(
-    properties={
-        "schemas": Object(additional_properties=Reference("JSONSchema", definitions=openapi_definitions)),
-        "responses": Object(additional_properties=Reference("Response", definitions=openapi_definitions)),
-        "parameters": Object(additional_properties=Reference("Parameter", definitions=openapi_definitions)),
-        "requestBodies": Object(additional_properties=Reference("RequestBody", definitions=openapi_definitions)),
-        "securitySchemes": Object(additional_properties=Reference("SecurityScheme", definitions=openapi_definitions)),
-        # TODO: Other fields
-    },
-    pattern_properties={
-        "^x-": Any(),
-    },
-    additional_properties=False,
-)
-
-openapi_definitions["Tag"] = Object(
-    properties={
-        "name": String(),
-        "description": String(format="textarea"),
-        "externalDocs": Reference("ExternalDocumentation", definitions=openapi_definitions),
-    },
-    pattern_properties={
-        "^x-": Any(),
-    },
-    additional_properties=False,
-    required=["name"]
-)
-
-openapi_definitions["SecurityRequirement"] = Object(
-    additional_properties=Array(items=String()),
-)
-
-openapi_definitions["SecurityScheme"] = Object(
-    properties={
-        "type": Choice(choices=["apiKey", "http", "oauth2", "openIdConnect"]),
-        "description": String(format="textarea"),
-        "name": String(),
-        "in": Choice(choices=["query", "header", "cookie"]),
-        "scheme": String(),
-        "bearerFormat": String(),
-        "flows": Any(),  # TODO: OAuthFlows
-        "openIdConnectUrl": String(),
-    },
-    pattern_properties={
-        "^x-": Any(),
-    },
-    additional_properties=False,
-    required=["type"]
-)
-
-METHODS = [
-    "get", "put", "post", "delete", "options", "head", "patch", "trace"
-]
+# link urls built from routes are plain paths, which need no parsing
+PLAIN_PATH = re.compile(r"/(?!/)[^?#;\s]*")
+
+
+@functools.lru_cache(maxsize=None)
+def build_openapi_schema():
+    """
+    Build the OpenAPI schema and its definitions on first use.
+    """
+    openapi_definitions = SchemaDefinitions()
+    references = []
+
+    def ref(name):
+        reference = Reference(name, definitions=openapi_definitions)
+        references.append(reference)
+        return reference
+
+    # leaf schemas shared by many definitions
+    any_value = Any()
+    textarea = String(format="textarea")
+    url = String(format="url")
+    email = String(format="email")
+    string = String()
+    strings = Array(items=string)
+    boolean = Boolean()
+
+    # the "^x-" specification extensions allowed on most objects
+    extensions = {"^x-": any_value}
+
+    # unions shared by several definitions, built once since `|` mutates
+    schema_or_ref = ref("JSONSchema") | SchemaRef
+    response_or_ref = ref("Response") | ResponseRef
+    request_body_or_ref = RequestBodyRef | ref("RequestBody")
+
+    OpenAPI = Object(
+        title="OpenAPI",
+        properties={
+            "openapi": string,
+            "info": ref("Info"),
+            "servers": Array(items=ref("Server")),
+            "paths": ref("Paths"),
+            "components": ref("Components"),
+            "security": Array(items=ref("SecurityRequirement")),
+            "tags": Array(items=ref("Tag")),
+            "externalDocs": ref("ExternalDocumentation"),
+        },
+        pattern_properties=extensions,
+        additional_properties=False,
+        required=["openapi", "info", "paths"]
+    )
+
+    openapi_definitions["JSONSchema"] = JSONSchema
+
+    openapi_definitions["Info"] = Object(
+        properties={
+            "title": String(allow_blank=True),
+            "description": String(format="textarea", allow_blank=True),
+            "termsOfService": String(format="url", allow_blank=True),
+            "contact": ref("Contact"),
+            "license": ref("License"),
+            "version": String(allow_blank=True),
+        },
+        pattern_properties=extensions,
+        additional_properties=False,
+        required=["title", "version"]
+    )
+
+    openapi_definitions["Contact"] = Object(
+        properties={
+            "name": string,
+            "url": url,
+            "email": email,
+        },
+        pattern_properties=extensions,
+        additional_properties=False,
+    )
+
+    openapi_definitions["License"] = Object(
+        properties={
+            "name": string,
+            "url": url,
+        },
+        required=["name"],
+        pattern_properties=extensions,
+        additional_properties=False,
+    )
+
+    openapi_definitions["Server"] = Object(
+        properties={
+            "url": String(allow_blank=True),
+            "description": textarea,
+            "variables": Object(additional_properties=ref("ServerVariable")),
+        },
+        pattern_properties=extensions,
+        additional_properties=False,
+        required=["url"]
+    )
+
+    openapi_definitions["ServerVariable"] = Object(
+        properties={
+            "enum": strings,
+            "default": string,
+            "description": textarea,
+        },
+        pattern_properties=extensions,
+        additional_properties=False,
+        required=["default"]
+    )
+
+    openapi_definitions["Paths"] = Object(
+        pattern_properties={
+            "^/": ref("Path"),
+            **extensions,
+        },
+        additional_properties=False,
+    )
+
+    openapi_definitions["Path"] = Object(
+        properties={
+            "summary": string,
+            "description": textarea,
+            "get": ref("Operation"),
+            "put": ref("Operation"),
+            "post": ref("Operation"),
+            "delete": ref("Operation"),
+            "options": ref("Operation"),
+            "head": ref("Operation"),
+            "patch": ref("Operation"),
+            "trace": ref("Operation"),
+            "servers": Array(items=ref("Server")),
+            "parameters": Array(items=ref("Parameter"))  # TODO: | ReferenceObject
+        },
+        pattern_properties=extensions,
+        additional_properties=False,
+    )
+
+    openapi_definitions["Operation"] = Object(
+        properties={
+            "tags": strings,
+            "summary": string,
+            "description": textarea,
+            "externalDocs": ref("ExternalDocumentation"),
+            "operationId": string,
+            "parameters": Array(items=ref("Parameter")),
+            # TODO: | ReferenceObject
+            "requestBody": request_body_or_ref,
+            # TODO: RequestBody | ReferenceObject
+            "responses": ref("Responses"),
+            # TODO: "callbacks"
+            "deprecated": boolean,
+            "security": Array(ref("SecurityRequirement")),
+            "servers": Array(items=ref("Server")),
+        },
+        pattern_properties=extensions,
+        additional_properties=False,
+    )
+
+    openapi_definitions["ExternalDocumentation"] = Object(
+        properties={
+            "description": textarea,
+            "url": url,
+        },
+        pattern_properties=extensions,
+        additional_properties=False,
+        required=["url"]
+    )
+
+    openapi_definitions["Parameter"] = Object(
+        properties={
+            "name": string,
+            "in": Choice(choices=["query", "header", "path", "cookie"]),
+            "description": textarea,
+            "required": boolean,
+            "deprecated": boolean,
+            "allowEmptyValue": boolean,
+            "style": string,
+            "schema": schema_or_ref,
+            "example": any_value,
+            # TODO: Other fields
+        },
+        pattern_properties=extensions,
+        additional_properties=False,
+        required=["name", "in"]
+    )
+
+    openapi_definitions["RequestBody"] = Object(
+        properties={
+            "description": string,
+            "content": Object(additional_properties=ref("MediaType")),
+            "required": boolean,
+        },
+        pattern_properties=extensions,
+        additional_properties=False,
+    )
+
+    openapi_definitions["Responses"] = Object(
+        properties={
+            "default": response_or_ref,
+        },
+        pattern_properties={
+            "^([1-5][0-9][0-9]|[1-5]XX)$": response_or_ref,
+            **extensions,
+        },
+        additional_properties=False,
+    )
+
+    openapi_definitions["Response"] = Object(
+        properties={
+            "description": string,
+            "content": Object(additional_properties=ref("MediaType")),
+            "headers": Object(additional_properties=ref("Header")),
+            # TODO: Header | ReferenceObject
+            # TODO: links
+        },
+        pattern_properties=extensions,
+        additional_properties=False,
+    )
+
+    openapi_definitions["MediaType"] = Object(
+        properties={
+            "schema": schema_or_ref,
+            "example": any_value,
+            # TODO "examples", "encoding"
+        },
+        pattern_properties=extensions,
+        additional_properties=False,
+    )
+
+    openapi_definitions["Header"] = Object(
+        properties={
+            "description": textarea,
+            "required": boolean,
+            "deprecated": boolean,
+            "allowEmptyValue": boolean,
+            "style": string,
+            "schema": schema_or_ref,
+            "example": any_value,
+            # TODO: Other fields
+        },
+        pattern_properties=extensions,
+        additional_properties=False
+    )
+
+    openapi_definitions["Components"] = Object(
+        properties={
+            "schemas": Object(additional_properties=ref("JSONSchema")),
+            "responses": Object(additional_properties=ref("Response")),
+            "parameters": Object(additional_properties=ref("Parameter")),
+            "requestBodies": Object(additional_properties=ref("RequestBody")),
+            "securitySchemes": Object(additional_properties=ref("SecurityScheme")),
+            # TODO: Other fields
+        },
+        pattern_properties=extensions,
+        additional_properties=False,
+    )
+
+    openapi_definitions["Tag"] = Object(
+        properties={
+            "name": string,
+            "description": textarea,
+            "externalDocs": ref("ExternalDocumentation"),
+        },
+        pattern_properties=extensions,
+        additional_properties=False,
+        required=["name"]
+    )
+
+    openapi_definitions["SecurityRequirement"] = Object(
+        additional_properties=strings,
+    )
+
+    openapi_definitions["SecurityScheme"] = Object(
+        properties={
+            "type": Choice(choices=["apiKey", "http", "oauth2", "openIdConnect"]),
+            "description": textarea,
+            "name": string,
+            "in": Choice(choices=["query", "header", "cookie"]),
+            "scheme": string,
+            "bearerFormat": string,
+            "flows": any_value,  # TODO: OAuthFlows
+            "openIdConnectUrl": string,
+        },
+        pattern_properties=extensions,
+        additional_properties=False,
+        required=["type"]
+    )
+
+    # resolve every reference now, so that validation never looks them up
+    # and a missing definition fails here rather than on some document
+    for reference in references:
+        reference.target
+
+    return OpenAPI, openapi_definitions
+
+
+def __getattr__(name):
+    if name == "OpenAPI":
+        return build_openapi_schema()[0]
+    if name == "openapi_definitions":
+        return build_openapi_schema()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# link method -> path item key, so that the keys are shared constants
+METHODS = {
+    method.upper(): method for method in (
+        "get", "put", "post", "delete", "options", "head", "patch", "trace"
+    )
+}
 
 
 class OpenAPICodec(BaseCodec):
     media_type = "application/vnd.oai.openapi"
     format = "openapi"
 
+    def __init__(self):
+        # document -> (encoded bytes, whether they were validated), kept per
+        # codec since subclasses may encode the same document differently
+        self.encoded = weakref.WeakKeyDictionary()
+
+    def clear(self, document=None):
+        """
+        Drop the cached output for `document`, or for everything.
+        Call it after changing a document that has already been encoded.
+        """
+        if document is None:
+            self.encoded.clear()
+        else:
+            self.encoded.pop(document, None)
+
     def encode(self, document, **options):
         if not isinstance(document, Document):
             error = "Document instance expected."
             raise TypeError(error)
 
+        validate = options.get("validate", __debug__)
+        try:
+            content, validated = self.encoded[document]
+        except KeyError:
+            pass
+        else:
+            if validated or not validate:
+                return content
+
         definitions = {}
         codec = JSONSchemaEncoder(
             definitions,
             definition_base="components/schemas"
         )
         paths = self.get_paths(document, codec=codec)
-        data = self.validate_document(document, definitions, paths)
-        kwargs = {
-            "ensure_ascii": False,
-            "indent": 4,
-            "separators": (",", ": ")
-        }
-        return json.dumps(data, **kwargs).encode("utf-8")
+        data = self.validate_document(document, definitions, paths, validate)
+        content = dumps(data, indent=True)
+        self.encoded[document] = (content, validate)
+        return content
 
     @staticmethod
-    def validate_document(document, definitions, paths):
-        openapi = OpenAPI.validate({
+    def validate_document(document, definitions, paths, validate=__debug__):
+        info = {"title": document.title or ""}
+        if document.description:
+            info["description"] = document.description
+        info["version"] = document.version or ""
+
+        # built in schema order, optional fields only when they are set
+        openapi = {
             "openapi": "3.0.0",
-            "info": {
-                "version": document.version,
-                "title": document.title,
-                "description": document.description
-            },
-            "servers": [{
-                "url": document.url
-            }],
-            "paths": paths
-        })
+            "info": info,
+        }
+        if document.url:
+            openapi["servers"] = [{"url": document.url}]
+        openapi["paths"] = paths
 
-        if definitions:
-            openapi["components"] = {"schemas": dict(definitions)}
+        # the document is built by us, so by default only check it when
+        # not optimized, pass `validate` to encode() to override
+        if validate:
+            openapi_schema, _ = build_openapi_schema()
+            openapi_schema.validate(openapi)
 
-        if not document.url:
-            openapi.pop("servers")
+        if definitions:
+            openapi["components"] = {"schemas": definitions}
 
         return openapi
 
     def get_paths(self, document, codec):
-        paths = dict_type()
-
-        for link, name, sections in document.walk_links():
-            path = urlparse(link.url).path
-            operation_id = link.name
-            method = link.method.lower()
+        paths = {}
+        setdefault = paths.setdefault
+        get_operation = self.get_operation
+        is_plain_path = PLAIN_PATH.fullmatch
 
-            if path not in paths:
-                paths[path] = {}
-            paths[path][method] = self.get_operation(link, operation_id, codec)
+        for link, name, sections in document.iter_links():
+            url = link.url
+            path = url if is_plain_path(url) else urlparse(url).path
+            setdefault(path, {})[METHODS[link.method]] = get_operation(link, link.name, codec)
 
         return paths
 
     def get_operation(self, link, operation_id, codec):
-        operation = {
-            "operationId": operation_id
-        }
-        if link.title:
-            operation["summary"] = link.title
-        if link.description:
-            operation["description"] = link.description
-        tags = link.tags if link.tags else []
-        if tags:
-            operation["tags"] = tags
-        if link.path_fields or link.query_fields:
-            operation["parameters"] = [
-                self.get_parameter(field, codec) for field in
-                link.path_fields + link.query_fields
+        path_fields = link.path_fields
+        query_fields = link.query_fields
+        body_field = link.body_field
+        link_response = link.response
+
+        parameters = None
+        if path_fields or query_fields:
+            get_parameter = self.get_parameter
+            parameters = [
+                get_parameter(field, codec) for field in
+                chain(path_fields, query_fields)
             ]
-        if link.body_field:
-            schema = link.body_field.schema
-            if schema is None:
-                content_info = {}
-            else:
-                content_info = {
-                    "schema": codec.encode(Reference(to=schema))
-                }
-            operation["requestBody"] = {
+
+        request_body = None
+        if body_field:
+            request_body = {
                 "content": {
-                    link.encoding: content_info
+                    link.encoding: self.get_media_type(body_field.schema, codec)
                 }
             }
-        if link.response is not None:
-            schema = link.response.schema
-            if is_schema(schema):
-                schema = Reference(to=schema)
+
+        responses = None
+        if link_response is not None:
             response = {
                 "description": "",
             }
-            if schema is not None:
+            if link_response.schema is not None:
                 response["content"] = {
-                    link.response.encoding: {
-                        "schema": codec.encode(schema)
-                    }
+                    link_response.encoding: self.get_media_type(link_response.schema, codec)
                 }
-            operation["responses"] = {
-                str(link.response.status_code): response
+            responses = {
+                str(link_response.status_code): response
             }
-        return operation
+
+        operation = {
+            "tags": link.tags,
+            "summary": link.title,
+            "description": link.description,
+            "operationId": operation_id,
+            "parameters": parameters,
+            "requestBody": request_body,
+            "responses": responses,
+        }
+        return {key: value for key, value in operation.items() if value}
+
+    @staticmethod
+    def get_media_type(schema, codec):
+        if schema is None:
+            return {}
+        if is_schema(schema):
+            schema = Reference(to=schema)
+        return {"schema": codec.encode(schema)}
 
     @staticmethod
     def get_parameter(field, codec):
@@ -1,10 +1,11 @@
-import collections
-import sys
+# kept for code that imports it; dicts preserve insertion order on every supported Python
+dict_type = dict
 
-if sys.version_info < (3, 6):
-    dict_type = collections.OrderedDict
-else:
-    dict_type = dict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 try:
@@ -6,6 +6,8 @@ from stark import schema
 
 LinkInfo = collections.namedtuple('LinkInfo', ['link', 'name', 'sections'])
 
+URL_PARAM_REGEX = re.compile('{[^}]*}')
+
 
 class Document:
     def __init__(self,
@@ -42,14 +44,14 @@ class Document:
         return [item for item in self.content if isinstance(item, Section)]
 
     def walk_links(self):
-        link_info_list = []
+        return list(self.iter_links())
+
+    def iter_links(self):
         for item in self.content:
             if isinstance(item, Link):
-                link_info = LinkInfo(link=item, name=item.name, sections=())
-                link_info_list.append(link_info)
+                yield LinkInfo(link=item, name=item.name, sections=())
             else:
-                link_info_list.extend(item.walk_links())
-        return link_info_list
+                yield from item.iter_links()
 
 
 class Section:
@@ -85,16 +87,16 @@ class Section:
         return [item for item in self.content if isinstance(item, Section)]
 
     def walk_links(self, previous_sections=()):
-        link_info_list = []
+        return list(self.iter_links(previous_sections))
+
+    def iter_links(self, previous_sections=()):
         sections = previous_sections + (self,)
         for item in self.content:
             if isinstance(item, Link):
                 name = ':'.join([section.name for section in sections] + [item.name])
-                link_info = LinkInfo(link=item, name=name, sections=sections)
-                link_info_list.append(link_info)
+                yield LinkInfo(link=item, name=name, sections=sections)
             else:
-                link_info_list.extend(item.walk_links(previous_sections=sections))
-        return link_info_list
+                yield from item.iter_links(previous_sections=sections)
 
 
 class Link:
@@ -118,13 +120,13 @@ class Link:
         method = method.upper()
         fields = fields or []
         url_path_names = set([
-            item.strip('{}').lstrip('+') for item in re.findall('{[^}]*}', url)
+            item.strip('{}').lstrip('+') for item in URL_PARAM_REGEX.findall(url)
         ])
 
-        assert method in (
+        assert method in {
             'GET', 'POST', 'PUT', 'PATCH',
             'DELETE', 'OPTIONS', 'HEAD', 'TRACE'
-        )
+        }
 
         path_fields = [field for field in fields if field.location == 'path']
         query_fields = [field for field in fields if field.location == 'query']
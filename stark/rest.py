@@ -13,14 +13,14 @@ def make_create_route(resource: str,
                       standalone: bool = False):
     if baseurl is None:
         baseurl = resource
-    url = "/" + baseurl.lstrip("/")
+    url = join_url(baseurl)
     return Route(
         url=url,
         method="POST",
         handler=find_handler(handler),
         documented=documented,
         standalone=standalone,
-        tags=[resource, "#create"]
+        tags=(resource, "#create")
     )
 
 
@@ -31,14 +31,14 @@ def make_list_route(resource: str,
                     standalone: bool = False):
     if baseurl is None:
         baseurl = resource
-    url = "/" + baseurl.lstrip("/")
+    url = join_url(baseurl)
     return Route(
         url=url,
         method="GET",
         handler=find_handler(handler),
         documented=documented,
         standalone=standalone,
-        tags=[resource, "#list"]
+        tags=(resource, "#list")
     )
 
 
@@ -50,14 +50,14 @@ def make_retrieve_route(resource: str,
                         standalone: bool = False):
     if baseurl is None:
         baseurl = resource
-    url = "/" + ("%s/{%s}" % (baseurl, lookup_param)).lstrip("/")
+    url = join_url(baseurl, f"{{{lookup_param}}}")
     return Route(
         url=url,
         method="GET",
         handler=find_handler(handler),
         documented=documented,
         standalone=standalone,
-        tags=[resource, "#get"]
+        tags=(resource, "#get")
     )
 
 
@@ -69,14 +69,14 @@ def make_update_route(resource: str,
                       standalone: bool = False):
     if baseurl is None:
         baseurl = resource
-    url = "/" + ("%s/{%s}" % (baseurl, lookup_param)).lstrip("/")
+    url = join_url(baseurl, f"{{{lookup_param}}}")
     return Route(
         url=url,
         method="PUT",
         handler=find_handler(handler),
         documented=documented,
         standalone=standalone,
-        tags=[resource, "#update"]
+        tags=(resource, "#update")
     )
 
 
@@ -88,14 +88,14 @@ def make_destroy_route(resource: str,
                        standalone: bool = False):
     if baseurl is None:
         baseurl = resource
-    url = "/" + ("%s/{%s}" % (baseurl, lookup_param)).lstrip("/")
+    url = join_url(baseurl, f"{{{lookup_param}}}")
     return Route(
         url=url,
         method="DELETE",
         handler=find_handler(handler),
         documented=documented,
         standalone=standalone,
-        tags=[resource, "#delete"]
+        tags=(resource, "#delete")
     )
 
 
@@ -113,22 +113,33 @@ def make_action_route(resource: str,
     if action is None:
         action = handler.__name__
     if lookup_param:
-        url = "/" + ("%s/{%s}/%s" % (baseurl, lookup_param, action)).lstrip("/")
+        url = join_url(baseurl, f"{{{lookup_param}}}", action)
     else:
-        url = "/" + ("%s/%s" % (baseurl, action)).lstrip("/")
+        url = join_url(baseurl, action)
     return Route(
         url=url,
         method=method,
         handler=handler,
         documented=documented,
         standalone=standalone,
-        tags=[resource, "#action"]
+        tags=(resource, "#action")
     )
 
 
+def join_url(*parts: str) -> str:
+    return "/" + "/".join(parts).lstrip("/")
+
+
+# dotted path -> imported handler, routes of a resource share their handlers
+HANDLERS: typing.Dict[str, typing.Callable] = {}
+
+
 def find_handler(handler: typing.Union[str, typing.Callable]) -> typing.Callable:
     if isinstance(handler, str):
-        handler = import_path(handler)
+        path = handler
+        handler = HANDLERS.get(path)
+        if handler is None:
+            handler = HANDLERS[path] = import_path(path)
     assert callable(handler)
     return handler
 
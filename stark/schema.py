@@ -67,15 +67,13 @@ class SchemaOptions(typing.NamedTuple):
             required = extend_option(options.required, new_options.required)
         else:
             required = options.required
-        conflicts = set(read_only).intersection(required)
+        conflicts = frozenset(read_only).intersection(required) if read_only and required else None
         if conflicts:
             if hasattr(new_options, "read_only"):
                 required = [field for field in required if field not in conflicts]
             else:
                 read_only = [field for field in read_only if field not in conflicts]
-        for field in read_only:
-            assert field in schema.fields, f"No such field `{field}`."
-        for field in required:
+        for field in (*read_only, *required):
             assert field in schema.fields, f"No such field `{field}`."
         if hasattr(new_options, "strict"):
             assert isinstance(new_options.strict, bool), "`strict` must be a boolean"
@@ -87,6 +85,7 @@ class SchemaOptions(typing.NamedTuple):
 
 class Schema(SchemaBase):
 
+    _schema = None
     _validator = None
     _meta: SchemaOptions = SchemaOptions()
 
@@ -95,16 +94,19 @@ class Schema(SchemaBase):
         if hasattr(cls, "Meta"):
             cls._meta = SchemaOptions._new(cls, cls.Meta)
             delattr(cls, "Meta")
+        cls._schema = None
         cls._validator = None
 
     @classmethod
     def make_schema(cls) -> Field:
         # used in openapi
-        return Object(
-            properties=cls.fields,
-            required=cls._meta.required,
-            additional_properties=False if cls._meta.strict else None
-        )
+        if cls._schema is None:
+            cls._schema = Object(
+                properties=cls.fields,
+                required=cls._meta.required,
+                additional_properties=False if cls._meta.strict else None
+            )
+        return cls._schema
 
     @classmethod
     def make_validator(cls, *, strict: bool = False) -> Field:
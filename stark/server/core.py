@@ -139,7 +139,7 @@ class LinkGenerator:
         fields = self.generate_fields(url, method, handler)
         response = self.generate_response(handler)
         encoding = None
-        if any([f.location == "body" for f in fields]):
+        if any(f.location == "body" for f in fields):
             encoding = "application/json"
         description = (docstring.short_description + "\n" + docstring.long_description).strip()
         return document.Link(
@@ -4,9 +4,11 @@ from stark.server.asgi import ASGIReceive, ASGIScope, ASGISend
 from stark.server.wsgi import WSGIEnviron, WSGIStartResponse
 
 
+schema_codec = OpenAPICodec()
+
+
 def serve_schema(app: App):
-    codec = OpenAPICodec()
-    content = codec.encode(app.document)
+    content = schema_codec.encode(app.document)
     headers = {'Content-Type': 'application/vnd.oai.openapi'}
     return http.Response(content, headers=headers)
 
@@ -4,7 +4,6 @@ from urllib.parse import urlparse
 import werkzeug
 from werkzeug.routing import Map, Rule
 from stark import exceptions
-from stark.compat import dict_type
 from stark.server.core import Include, Route
 
 
@@ -56,7 +55,7 @@ class Router(BaseRouter):
         self.name_lookups = name_lookups
 
         # Use an MRU cache for router lookups.
-        self._lookup_cache = dict_type()
+        self._lookup_cache = {}
         self._lookup_cache_size = 10000
 
     def walk_routes(self, routes, url_prefix='', name_prefix=''):
@@ -0,0 +1,216 @@
+import json
+from urllib.parse import urlparse
+
+import pytest
+
+from stark import schema
+from stark.codecs import jsondata, JSONCodec, JSONSchemaCodec, OpenAPICodec
+from stark.codecs.jsonschema import JSONSchemaEncoder
+from stark.codecs.openapi import PLAIN_PATH, build_openapi_schema
+from stark.document import Document, Field, Link, Response
+
+
+definitions = schema.SchemaDefinitions()
+
+
+class Parent(schema.Schema, definitions=definitions):
+    name = schema.String()
+    children = schema.Array(items=schema.Reference("Child", definitions=definitions))
+
+
+class Child(schema.Schema, definitions=definitions):
+    name = schema.String()
+    parent = schema.Reference("Parent", definitions=definitions)
+
+
+class User(schema.Schema):
+    id = schema.Integer()
+    name = schema.String()
+
+
+def handler():
+    pass
+
+
+def make_document():
+    return Document(
+        title="API",
+        content=[
+            Link("/users/", "POST", handler, name="create_user", encoding="application/json",
+                 fields=[Field("user", "body", schema=User)],
+                 response=Response("application/json", schema=User)),
+        ]
+    )
+
+
+# JSON
+
+def test_json_big_integers():
+    codec = JSONCodec()
+    assert codec.decode(b'{"n": 123456789012345678901234567890}') == {"n": 123456789012345678901234567890}
+    assert json.loads(codec.encode({"n": 2 ** 70})) == {"n": 2 ** 70}
+    assert json.loads(codec.encode({"n": 2 ** 70}, indent=True)) == {"n": 2 ** 70}
+
+
+@pytest.mark.skipif(jsondata.orjson is None, reason="orjson is not installed")
+def test_json_long_digits_in_strings(monkeypatch):
+    class NoJSON:
+        @staticmethod
+        def loads(bytestring):
+            raise AssertionError("json module used")
+
+    monkeypatch.setattr(jsondata, "json", NoJSON)
+    assert JSONCodec().decode(b'{"card": "12345678901234567890"}') == {"card": "12345678901234567890"}
+
+
+def test_json_non_finite_numbers():
+    data = JSONCodec().decode(b'[NaN, Infinity, -Infinity, 1e400]')
+    assert data[0] != data[0]
+    assert data[1:] == [float("inf"), float("-inf"), float("inf")]
+
+
+# JSON Schema
+
+def test_encode_schema_definitions():
+    defs = {}
+    encoder = JSONSchemaEncoder(defs)
+    assert encoder.encode(definitions) == {}
+    assert set(defs) == {"Parent", "Child"}
+    assert defs["Child"]["properties"]["parent"] == {"$ref": "#/definitions/Parent"}
+
+
+def test_encoder_subclass_override():
+    class UpperEncoder(JSONSchemaEncoder):
+        def encode_string(self, field, data):
+            super().encode_string(field, data)
+            data["x-upper"] = True
+
+    data = UpperEncoder().encode(User)
+    assert data["properties"]["name"]["x-upper"] is True
+    assert "x-upper" not in JSONSchemaEncoder().encode(User)["properties"]["name"]
+
+
+def test_encode_mutually_referencing_schemas():
+    data = json.loads(JSONSchemaCodec().encode(Parent))
+    assert data["properties"]["children"]["items"] == {"$ref": "#/definitions/Child"}
+    assert data["definitions"]["Child"]["properties"]["parent"] == {"$ref": "#/definitions/Parent"}
+    assert data["definitions"]["Parent"]["properties"] == data["properties"]
+
+
+def test_jsonschema_cache():
+    codec = JSONSchemaCodec()
+    compact = codec.encode(User)
+    indented = codec.encode(User, indent=True)
+    assert codec.encode(User) is compact
+    assert codec.encode(User, indent=True) is indented
+    assert compact != indented
+    assert json.loads(compact) == json.loads(indented)
+
+    codec.clear(User)
+    assert codec.encode(User) is not compact
+    assert JSONSchemaCodec().encode(User) is not compact
+
+
+def test_jsonschema_big_integers():
+    class Counter(schema.Schema):
+        value = schema.Integer(maximum=2 ** 70, default=2 ** 64)
+
+    codec = JSONSchemaCodec()
+    for indent in (False, True):
+        data = json.loads(codec.encode(Counter, indent=indent))
+        assert data["properties"]["value"]["maximum"] == 2 ** 70
+        assert data["properties"]["value"]["default"] == 2 ** 64
+    assert codec.encode(Counter, indent=True).startswith(b'{\n  "')
+
+
+def test_jsonschema_cache_per_subclass():
+    class CustomCodec(JSONSchemaCodec):
+        pass
+
+    JSONSchemaCodec().encode(User)
+    assert User not in CustomCodec().encoded
+
+
+# OpenAPI
+
+@pytest.mark.parametrize("url", ["/", "/users/", "/users/{pk}/", "/files/{path}/raw.txt"])
+def test_plain_path(url):
+    assert PLAIN_PATH.fullmatch(url)
+    assert urlparse(url).path == url
+
+
+@pytest.mark.parametrize("url", ["//host/users/", "/users/?page=1", "/users/#top", "/users/;v=1", "http://host/users/"])
+def test_not_plain_path(url):
+    assert not PLAIN_PATH.fullmatch(url)
+    assert urlparse(url).path != url
+
+
+def test_openapi_request_body_field_schema():
+    document = Document(content=[
+        Link("/numbers/", "POST", handler, encoding="application/json",
+             fields=[Field("numbers", "body", schema=schema.Array(items=schema.Integer()))]),
+    ])
+    data = json.loads(OpenAPICodec().encode(document))
+    content = data["paths"]["/numbers/"]["post"]["requestBody"]["content"]
+    assert content["application/json"]["schema"]["type"] == "array"
+
+
+def test_openapi_cache():
+    codec = OpenAPICodec()
+    document = make_document()
+    content = codec.encode(document)
+    assert codec.encode(document) is content
+    assert json.loads(content)["components"]["schemas"]["User"]["type"] == "object"
+
+    codec.clear(document)
+    assert codec.encode(document) is not content
+    assert OpenAPICodec().encode(document) is not content
+
+
+def test_openapi_cache_per_subclass():
+    class CustomCodec(OpenAPICodec):
+        def get_operation(self, link, operation_id, codec):
+            operation = super().get_operation(link, operation_id, codec)
+            operation["x-custom"] = True
+            return operation
+
+    document = make_document()
+    OpenAPICodec().encode(document)
+    data = json.loads(CustomCodec().encode(document))
+    assert data["paths"]["/users/"]["post"]["x-custom"] is True
+
+
+def test_openapi_big_integers():
+    document = Document(content=[
+        Link("/items/", "GET", handler,
+             fields=[Field("limit", "query", schema=schema.Integer(maximum=2 ** 70, default=2 ** 64))]),
+    ])
+    content = OpenAPICodec().encode(document)
+    parameter = json.loads(content)["paths"]["/items/"]["get"]["parameters"][0]
+    assert parameter["schema"]["maximum"] == 2 ** 70
+    assert parameter["schema"]["default"] == 2 ** 64
+    assert content.startswith(b'{\n  "')
+
+
+def test_openapi_validate_option(monkeypatch):
+    openapi, _ = build_openapi_schema()
+    validated = []
+
+    def validate(value, **kwargs):
+        validated.append(value)
+        return value
+
+    monkeypatch.setattr(openapi, "validate", validate)
+    codec = OpenAPICodec()
+    document = make_document()
+
+    content = codec.encode(document, validate=False)
+    assert validated == []
+    assert codec.encode(document, validate=False) is content
+
+    # cached output was never checked, so a validating call encodes again
+    assert codec.encode(document, validate=True) == content
+    assert len(validated) == 1
+    codec.encode(document, validate=True)
+    codec.encode(document, validate=False)
+    assert len(validated) == 1
@@ -0,0 +1,25 @@
+import types
+
+from stark.document import Document, Link, Section
+
+
+def handler():
+    pass
+
+
+def test_iter_links():
+    users = Link("/users/", "GET", handler, name="list_users")
+    detail = Link("/users/{pk}/", "GET", handler, name="get_user")
+    health = Link("/health/", "GET", handler, name="health")
+    admin = Section(name="admin", content=[Section(name="users", content=[users, detail])])
+    document = Document(content=[health, admin])
+
+    links = document.iter_links()
+    assert isinstance(links, types.GeneratorType)
+    assert [(info.link, info.name) for info in links] == [
+        (health, "health"),
+        (users, "admin:users:list_users"),
+        (detail, "admin:users:get_user"),
+    ]
+    assert [info.sections for info in document.iter_links()][1] == (admin, admin.content[0])
+    assert document.walk_links() == list(document.iter_links())
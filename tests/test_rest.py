@@ -0,0 +1,32 @@
+import json
+
+from stark import rest
+
+
+def test_find_handler_cache(monkeypatch):
+    monkeypatch.setattr(rest, "HANDLERS", {})
+    assert rest.find_handler("json.dumps") is json.dumps
+    assert rest.HANDLERS == {"json.dumps": json.dumps}
+
+    def handler():
+        pass
+
+    rest.HANDLERS["json.dumps"] = handler
+    assert rest.find_handler("json.dumps") is handler
+    assert rest.find_handler(json.loads) is json.loads
+
+
+def test_join_url():
+    assert rest.join_url("users") == "/users"
+    assert rest.join_url("/users") == "/users"
+    assert rest.join_url("", "{pk}") == "/{pk}"
+    assert rest.join_url("users", "{pk}", "activate") == "/users/{pk}/activate"
+    assert rest.join_url("/", "activate") == "/activate"
+
+
+def test_route_urls():
+    assert rest.make_list_route("users", json.dumps).url == "/users"
+    assert rest.make_retrieve_route("users", json.dumps, "pk").url == "/users/{pk}"
+    assert rest.make_retrieve_route("users", json.dumps, "pk", baseurl="").url == "/{pk}"
+    assert rest.make_action_route("users", json.dumps, "POST", lookup_param="pk").url == "/users/{pk}/dumps"
+    assert rest.make_action_route("users", json.dumps, "POST", action="export").url == "/users/export"
@@ -0,0 +1,20 @@
+from stark import schema
+
+
+class User(schema.Schema):
+    name = schema.String()
+
+
+def test_make_schema_cache():
+    user_schema = User.make_schema()
+    assert User.make_schema() is user_schema
+    assert set(user_schema.properties) == {"name"}
+
+    # subclassed after the parent schema is cached
+    class Admin(User):
+        level = schema.Integer()
+
+    admin_schema = Admin.make_schema()
+    assert admin_schema is not user_schema
+    assert Admin.make_schema() is admin_schema
+    assert set(admin_schema.properties) == {"name", "level"}